@@ -1,5 +1,5 @@
 """
-CSV Pivot Tool with DuckDB (v2.3.1)
+CSV Pivot Tool with DuckDB (v2.4.0)
 
 This tool reads a CSV file and generates a pivot table based on specified
 row and optional column fields. It counts the frequency of unique 
@@ -9,155 +9,75 @@ performance.
 You can specify:
 - --columns to pivot on column fields
 - --no-columns to disable column pivoting and group only by rows
+- --sort to order output rows by the row fields (unordered by default)
 
 Example usage:
 
     python pivot_tool.py -i data.csv -o output.csv --rows fieldA fieldB --columns fieldX fieldY
+    python pivot_tool.py -i data.csv -o output.csv --rows fieldA fieldB --columns fieldX --sort
     python pivot_tool.py -i data.csv -o output.csv --rows fieldA fieldB --no-columns
     python pivot_tool.py -i data.csv --dry-run
 
+Since v2.4.0 output rows come out in no particular order unless --sort is
+given; earlier versions always sorted them by the row fields. DuckDB now
+writes the file itself, so lines end in LF and typed values use DuckDB's
+text form: booleans are written as true/false where earlier versions wrote
+True/False.
+
 Author: Your Name
 License: MIT
 """
 
 import argparse
-import csv
 import logging
 import sys
 
 import duckdb  # pip install duckdb
 
-__version__ = "2.3.1"
+from pivot_core import (
+    connect,
+    create_data_view,
+    pivot_to_csv,
+    quote_identifier,
+)
 
+__version__ = "2.4.0"
 
-def quote_identifier(name):
-    """
-    Quote SQL identifiers safely by wrapping in double quotes and escaping
-    internal double quotes.
 
-    Args:
-        name (str): The identifier name to quote.
-
-    Returns:
-        str: Safely quoted identifier.
-    """
-    return '"' + name.replace('"', '""') + '"'
-
-
-def escape_literal(value):
-    """
-    Escape single quotes in SQL string literals to prevent syntax errors.
-
-    Args:
-        value (str): The string literal to escape.
-
-    Returns:
-        str: Escaped string literal.
-    """
-    return value.replace("'", "''")
-
-
-def pivot_data_with_duckdb(input_file, output_file, row_fields, column_fields):
+def pivot_data_with_duckdb(con, output_file, row_fields, column_fields, sort=False):
     """
     Use DuckDB to create a pivot table grouped by specified row and column
-    fields from a CSV file.
+    fields from the CSV data registered as the ``data`` view.
 
     Args:
-        input_file (str): Path to the input CSV file.
+        con (duckdb.DuckDBPyConnection): Connection holding the ``data`` view
+            (see create_data_view).
         output_file (str): Path where the output CSV will be saved.
         row_fields (list of str): Fields to use as row keys.
         column_fields (list of str or None): Fields to pivot as columns, or
             None to disable column pivoting.
+        sort (bool): Order output rows by the row fields. Skipping the sort
+            lets DuckDB stream groups out as soon as they are aggregated.
 
     Raises:
         SystemExit: If database or file operations fail.
     """
     try:
-        with duckdb.connect() as con:
-            # Create a DuckDB view for the CSV data
-            con.execute(f"CREATE VIEW data AS SELECT * FROM read_csv_auto('{input_file}')")
-
-            # Quote row fields for SQL safety
-            quoted_row_fields = [quote_identifier(f) for f in row_fields]
-
-            if column_fields:
-                # Quote column fields for SQL safety
-                quoted_column_fields = [quote_identifier(f) for f in column_fields]
-
-                # Concatenate column fields for pivot key using safe SQL concatenation
-                if len(quoted_column_fields) > 1:
-                    col_concat = " || '|' || ".join(quoted_column_fields)
-                else:
-                    col_concat = quoted_column_fields[0]
-
-                # Build WHERE clauses to exclude NULLs safely
-                col_not_null = [f"{f} IS NOT NULL" for f in quoted_column_fields]
-                row_not_null = [f"{f} IS NOT NULL" for f in quoted_row_fields]
-
-                # Query distinct pivot column values
-                distinct_cols_query = f"""
-                    SELECT DISTINCT {col_concat} AS col_key
-                    FROM data
-                    WHERE {" AND ".join(col_not_null)}
-                    ORDER BY col_key
-                """
-                distinct_cols = [row[0] for row in con.execute(distinct_cols_query).fetchall()]
-
-                if not distinct_cols:
-                    logging.warning("No distinct columns found to pivot on.")
-                    return
-
-                # Build CASE statements for pivot aggregation
-                case_statements = []
-                for col_val in distinct_cols:
-                    safe_val = escape_literal(col_val)
-                    case = (
-                        f"SUM(CASE WHEN ({col_concat}) = '{safe_val}' THEN 1 ELSE 0 END) "
-                        f"AS {quote_identifier(col_val)}"
-                    )
-                    case_statements.append(case)
-
-                pivot_query = f"""
-                    SELECT
-                        {', '.join(quoted_row_fields)},
-                        {', '.join(case_statements)}
-                    FROM data
-                    WHERE {" AND ".join(row_not_null)}
-                    GROUP BY {', '.join(quoted_row_fields)}
-                    ORDER BY {', '.join(quoted_row_fields)}
-                """
-
-                result = con.execute(pivot_query).fetchall()
-                columns = [desc[0] for desc in con.description]
-
-            else:
-                # Group by row fields and count occurrences when no columns pivot
-                row_not_null = [f"{f} IS NOT NULL" for f in quoted_row_fields]
-
-                pivot_query = f"""
-                    SELECT
-                        {', '.join(quoted_row_fields)},
-                        COUNT(*) AS count
-                    FROM data
-                    WHERE {" AND ".join(row_not_null)}
-                    GROUP BY {', '.join(quoted_row_fields)}
-                    ORDER BY {', '.join(quoted_row_fields)}
-                """
-
-                result = con.execute(pivot_query).fetchall()
-                columns = [desc[0] for desc in con.description]
-
-            # Write results to output CSV file
-            try:
-                with open(output_file, "w", encoding="utf-8", newline="") as outfile:
-                    writer = csv.writer(outfile)
-                    writer.writerow(columns)
-                    writer.writerows(result)
-            except IOError as e:
-                logging.error(f"Error writing output file: {e}")
-                sys.exit(1)
-
-            logging.info(f"Pivot table successfully created and saved to '{output_file}'")
+        # Quote fields for SQL safety; rows with NULL in any field are skipped
+        row_exprs = [(f, quote_identifier(f)) for f in row_fields]
+        column_exprs = [quote_identifier(f) for f in column_fields] if column_fields else None
+
+        try:
+            pivoted = pivot_to_csv(con, output_file, row_exprs, column_exprs, sort=sort)
+        except duckdb.IOException as e:
+            logging.error(f"Error writing output file: {e}")
+            sys.exit(1)
+
+        if not pivoted:
+            logging.warning("No distinct columns found to pivot on.")
+            return
+
+        logging.info(f"Pivot table successfully created and saved to '{output_file}'")
 
     except (duckdb.Error, Exception) as e:
         logging.error(f"Database query error: {e}")
@@ -203,6 +123,16 @@ def main():
         action="store_true",
         help="Do not pivot by columns, group only by rows",
     )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="Sort output rows by the row fields",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of DuckDB worker threads (default: all cores)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -222,37 +152,47 @@ def main():
         format="%(levelname)s: %(message)s",
     )
 
-    if args.dry_run:
-        try:
-            with open(args.input, "r", encoding="utf-8", newline="") as infile:
-                reader = csv.reader(infile)
-                headers = next(reader)
-                print("\nAvailable fields in input CSV:\n")
-                for field in headers:
-                    print(f"  - {field}")
-                print()
-        except IOError as e:
-            logging.error(f"Error reading input file: {e}")
-            sys.exit(1)
-        return
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
 
-    if not args.output:
-        parser.error("Missing required argument: -o/--output")
+    if not args.dry_run:
+        if not args.output:
+            parser.error("Missing required argument: -o/--output")
 
-    if not args.rows:
-        parser.error("Missing required argument: --rows")
+        if not args.rows:
+            parser.error("Missing required argument: --rows")
 
-    if args.columns and args.no_columns:
-        parser.error("Cannot specify both --columns and --no-columns")
+        if args.columns and args.no_columns:
+            parser.error("Cannot specify both --columns and --no-columns")
 
     column_fields = None if args.no_columns else args.columns
 
-    pivot_data_with_duckdb(
-        input_file=args.input,
-        output_file=args.output,
-        row_fields=args.rows,
-        column_fields=column_fields,
-    )
+    # Only the fields the pivot touches need decoding; the dry run lists them all
+    needed_fields = None
+    if not args.dry_run:
+        needed_fields = list(dict.fromkeys(args.rows + (column_fields or [])))
+
+    with connect(args.jobs) as con:
+        try:
+            create_data_view(con, args.input, needed_fields)
+        except duckdb.Error as e:
+            logging.error(f"Error reading input file: {e}")
+            sys.exit(1)
+
+        if args.dry_run:
+            print("\nAvailable fields in input CSV:\n")
+            for field, field_type, *_ in con.execute("DESCRIBE data").fetchall():
+                print(f"  - {field} ({field_type})")
+            print()
+            return
+
+        pivot_data_with_duckdb(
+            con=con,
+            output_file=args.output,
+            row_fields=args.rows,
+            column_fields=column_fields,
+            sort=args.sort,
+        )
 
     logging.info(f"Output saved to '{args.output}'")
 
@@ -0,0 +1,501 @@
+"""
+Shared pivot engine for the CSV pivot tools (v1.0.0)
+
+Counts how often each combination of row-field and column-field values
+occurs in a CSV file and writes the counts either as a pivot table (one
+output column per distinct column key) or as a flat table with a count
+column.
+
+Two backends are available:
+- duckdb: DuckDB scans, groups and pivots the CSV without passing rows
+  through Python (pip install duckdb)
+- python: a standard-library fallback
+
+Every output path writes the same CSV format: LF line endings, fields
+quoted only when they contain a separator, quote or newline. run_pivot
+falls back to the python backend for files DuckDB cannot parse like
+csv.reader (ragged rows, duplicate, case-clashing or BOM-prefixed header
+names), so both backends write identical files for the same input. The
+one known exception is malformed quoting such as text after a closing
+quote ('"x" ,'), which DuckDB drops and csv.reader keeps.
+
+A field can also be computed from another CSV field (e.g. pod uptime from
+starttime) by passing a ComputedField, which supplies the computation both
+as a SQL expression for DuckDB and as a Python function for the fallback.
+
+Author: Your Name
+License: MIT
+"""
+
+import csv
+import logging
+import os
+import tempfile
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import partial
+from operator import itemgetter
+
+try:
+    import duckdb  # optional: pip install duckdb
+except ImportError:
+    duckdb = None
+
+__version__ = "1.0.0"
+
+# Buffer size for CSV scans/writes; the 8 KiB default costs a syscall per 8 KiB
+_IO_BUFFER_SIZE = 1 << 20
+
+# A field derived from the CSV field ``source``. ``sql`` maps the SQL
+# expression of the source to the derived value and ``func`` maps its raw
+# string value (None if the CSV or row lacks the source field); either returns
+# NULL/None to skip the row. An optional ``cast`` names a SQL type the DuckDB
+# backend TRY_CASTs the source to once per row before ``sql`` sees it.
+ComputedField = namedtuple("ComputedField", ["source", "sql", "func", "cast"], defaults=(None,))
+
+
+def quote_identifier(name):
+    """
+    Quote SQL identifiers safely by wrapping in double quotes and escaping
+    internal double quotes.
+
+    Args:
+        name (str): The identifier name to quote.
+
+    Returns:
+        str: Safely quoted identifier.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def escape_literal(value):
+    """
+    Escape single quotes in SQL string literals to prevent syntax errors.
+
+    Args:
+        value (str): The string literal to escape.
+
+    Returns:
+        str: Escaped string literal.
+    """
+    return value.replace("'", "''")
+
+
+def configure_connection(con, threads=None, spill_dir=None):
+    """
+    Tune a DuckDB connection for a one-shot scan-and-aggregate workload.
+
+    Uses every core (or ``threads``) for the CSV scan and hash aggregation,
+    lets DuckDB reorder rows of queries without ORDER BY, and points it at
+    a directory to spill to when an aggregation does not fit in memory.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): Open DuckDB connection.
+        threads (int or None): Worker threads to use; None uses every core.
+        spill_dir (str or None): Private directory for DuckDB's spill files,
+            e.g. a directory that outlives the connection (see connect);
+            None keeps DuckDB's default.
+    """
+    threads = threads or os.cpu_count()
+    if threads:
+        con.execute(f"SET threads={threads}")
+    con.execute("SET preserve_insertion_order=false")
+    if spill_dir:
+        con.execute(f"SET temp_directory='{escape_literal(spill_dir)}'")
+
+
+@contextmanager
+def connect(threads=None):
+    """
+    Open an in-memory DuckDB connection tuned by configure_connection, with
+    a private spill directory that is removed when the context exits.
+
+    Args:
+        threads (int or None): Worker threads to use; None uses every core.
+
+    Yields:
+        duckdb.DuckDBPyConnection: The configured connection.
+    """
+    # The connection closes before its private spill directory is removed
+    with tempfile.TemporaryDirectory(prefix="duckdb_spill_") as spill_dir, \
+            duckdb.connect() as con:
+        configure_connection(con, threads, spill_dir)
+        yield con
+
+
+def create_data_view(con, input_file, fields=None, all_varchar=False, strict_dialect=False):
+    """
+    Register the input CSV as the ``data`` view on a DuckDB connection so
+    the dry run and the pivot share one parsed schema.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): Open DuckDB connection.
+        input_file (str): Path to the input CSV file.
+        fields (list of str or None): Columns to keep in the view, so the
+            CSV scan skips the rest; None keeps every column.
+        all_varchar (bool): Read every column as text instead of sniffing
+            column types.
+        strict_dialect (bool): Parse with the csv module's default dialect
+            (comma separator, header on the first line, double-quote quoting)
+            instead of sniffing it. Rows with a different number of fields then raise
+            duckdb.Error rather than being re-sniffed or padded.
+    """
+    options = {}
+    if strict_dialect:
+        options = {"sep": ",", "header": True, "quotechar": '"', "escapechar": '"',
+                   "skiprows": 0}
+    relation = con.read_csv(input_file, all_varchar=all_varchar, **options)
+    if fields:
+        relation = relation.project(", ".join(quote_identifier(f) for f in fields))
+    relation.create_view("data")
+
+
+def pivot_to_csv(con, output_file, row_exprs, column_exprs=None, sort=False, source="data"):
+    """
+    Count key combinations of the ``data`` view (or ``source``) with DuckDB
+    and write them to a CSV file.
+
+    Rows where any key expression is NULL are skipped. Pivot columns are
+    named after the column key values ("|"-joined for several column
+    expressions) and ordered by the key values as tuples.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): Connection holding the ``data`` view
+            (see create_data_view).
+        output_file (str): Path where the output CSV will be saved.
+        row_exprs (list of (str, str)): Output name and SQL expression of
+            each row key.
+        column_exprs (list of str or None): SQL expression of each column
+            key, or None to write a ``count`` column instead of pivoting.
+        sort (bool): Order output rows by the row keys. Skipping the sort
+            lets DuckDB stream groups out as soon as they are aggregated.
+        source (str): Table, view or parenthesized subquery the key
+            expressions are evaluated against.
+
+    Returns:
+        bool: False if there were no column key values to pivot on, in
+        which case nothing is written.
+    """
+    # Internal aliases can never match a CSV field, so user field names such as
+    # "col_key" cannot shadow them; the final SELECT renames the row keys back
+    row_names = [name for name, _ in row_exprs]
+    row_aliases = [f"__pivot_r{i}" for i in range(len(row_exprs))]
+    row_select = [f"{expr} AS {a}" for (_, expr), a in zip(row_exprs, row_aliases)]
+    rename_rows = [f"{a} AS {quote_identifier(name)}" for a, name in zip(row_aliases, row_names)]
+    order_by = f"ORDER BY {', '.join(row_aliases)}" if sort else ""
+
+    if not column_exprs:
+        not_null = [f"{a} IS NOT NULL" for a in row_aliases]
+        relation = con.sql(f"""
+            SELECT {', '.join(rename_rows)}, __pivot_count AS count
+            FROM (
+                SELECT {', '.join(row_aliases)}, COUNT(*) AS __pivot_count
+                FROM (SELECT {', '.join(row_select)} FROM {source})
+                WHERE {" AND ".join(not_null)}
+                GROUP BY {', '.join(row_aliases)}
+            )
+            {order_by}
+        """)
+        _write_relation(relation, output_file, row_names + ["count"])
+        return True
+
+    col_aliases = [f"__pivot_c{i}" for i in range(len(column_exprs))]
+    col_select = [f"{expr} AS {a}" for expr, a in zip(column_exprs, col_aliases)]
+    col_concat = " || '|' || ".join(f"CAST({a} AS VARCHAR)" for a in col_aliases)
+    not_null = [f"{a} IS NOT NULL" for a in row_aliases + col_aliases]
+
+    # Materialize the keyed projection once: it is scanned for the distinct
+    # pivot values and again by the PIVOT itself
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE src AS
+        SELECT *, {col_concat} AS __pivot_key
+        FROM (SELECT {', '.join(row_select + col_select)} FROM {source})
+        WHERE {" AND ".join(not_null)}
+    """)
+
+    # Sort the distinct keys as tuples so multi-field keys order per field
+    distinct_keys = sorted(
+        con.execute(
+            f"SELECT DISTINCT {', '.join(col_aliases)}, __pivot_key FROM src"
+        ).fetchall()
+    )
+    distinct_cols = [key[-1] for key in distinct_keys]
+    if not distinct_cols:
+        return False
+
+    relation = con.sql(f"""
+        SELECT {', '.join(rename_rows)}, * EXCLUDE ({', '.join(row_aliases)})
+        FROM (
+            PIVOT src
+            ON __pivot_key IN ({', '.join('?' * len(distinct_cols))})
+            USING COUNT(*)
+            GROUP BY {', '.join(row_aliases)}
+        )
+        {order_by}
+    """, params=distinct_cols)
+    _write_relation(relation, output_file, row_names + distinct_cols)
+    return True
+
+
+def _write_relation(relation, output_file, header):
+    """Write a DuckDB relation to CSV under the given header."""
+    if relation.columns == header:
+        # A NULL marker other than '' stops DuckDB quoting empty strings, matching
+        # csv.writer; no output cell is ever NULL
+        relation.write_csv(output_file, header=True, na_rep="NULL")
+        return
+
+    # DuckDB renames empty or duplicate column names; stream through csv.writer
+    with open(output_file, "w", newline="", encoding="utf-8",
+              buffering=_IO_BUFFER_SIZE) as outfile:
+        writer = csv.writer(outfile, lineterminator="\n")
+        writer.writerow(header)
+        while True:
+            batch = relation.fetchmany(10000)
+            if not batch:
+                break
+            writer.writerows(batch)
+
+
+def run_pivot(input_file, output_file, row_fields, column_fields=None,
+              computed=None, backend="duckdb", threads=None):
+    """
+    Pivot a CSV file, treating every field as text.
+
+    Empty cells are keys like any other value. Output rows are sorted by
+    the row keys and pivot columns by the column keys.
+
+    Args:
+        input_file (str): Path to the input CSV file.
+        output_file (str): Path where the output CSV will be saved.
+        row_fields (list of str): Fields to use as row keys.
+        column_fields (list of str or None): Fields to pivot as columns, or
+            None to write a ``count`` column instead of pivoting.
+        computed (dict of str to ComputedField or None): Fields computed
+            from another CSV field instead of read directly.
+        backend (str): "duckdb" or "python". The duckdb backend falls back to
+            the python one when DuckDB cannot parse the input (e.g. rows with
+            a different number of fields than the header) or would name its
+            columns differently from csv.reader (duplicate, case-clashing or
+            BOM-prefixed header names).
+        threads (int or None): DuckDB worker threads; None uses every core.
+            The python backend is single-threaded.
+
+    Returns:
+        bool: False if a field is missing from the input CSV, in which case
+        only the header row is written.
+
+    Raises:
+        ValueError: If the backend is unknown or DuckDB is not installed.
+    """
+    computed = computed or {}
+    if backend == "duckdb":
+        if duckdb is None:
+            raise ValueError("The duckdb backend requires `pip install duckdb`")
+        try:
+            result = _run_pivot_duckdb(input_file, output_file, row_fields, column_fields,
+                                       computed, threads)
+        except duckdb.InvalidInputException as e:
+            # Only CSV parse failures fall back, e.g. ragged rows that csv.reader
+            # tolerates; output I/O, out-of-memory and interrupt errors propagate
+            reason = str(e).splitlines()[0]
+        else:
+            if result is not None:
+                return result
+            reason = "DuckDB reads the header row differently from csv.reader"
+        logging.warning(f"DuckDB could not pivot the input ({reason}); "
+                        "falling back to the python backend.")
+        backend = "python"
+    if backend == "python":
+        return _run_pivot_python(input_file, output_file, row_fields, column_fields, computed)
+    raise ValueError(f"Unknown pivot backend: {backend!r}")
+
+
+def _check_fields(available, fields, computed):
+    """Log a warning and return False if any non-computed field is unavailable."""
+    missing = [f for f in fields if f not in computed and f not in available]
+    if missing:
+        logging.warning(f"Missing field(s) {missing} in input CSV. Skipping all rows.")
+        return False
+    return True
+
+
+def _run_pivot_duckdb(input_file, output_file, row_fields, column_fields, computed, threads):
+    """DuckDB backend of run_pivot; returns None, writing nothing, if its header differs."""
+    with connect(threads) as con:
+        create_data_view(con, input_file, all_varchar=True, strict_dialect=True)
+        columns = [row[0] for row in con.execute("DESCRIBE data").fetchall()]
+        # DuckDB renames duplicate names and strips a BOM; csv.reader does neither
+        if columns != _read_header(input_file):
+            return None
+        available = set(columns)
+        if not _check_fields(available, row_fields + (column_fields or []), computed):
+            _write_header(output_file, _empty_header(row_fields, column_fields))
+            return False
+
+        # Cast typed computed sources once per row in an inner projection, so
+        # the computed expressions compare a typed column instead of re-parsing
+        casts = []
+
+        def field_sql(field):
+            if field in computed:
+                source, cast = computed[field].source, computed[field].cast
+                source_sql = quote_identifier(source) if source in available else None
+                if cast:
+                    alias = f"__pivot_s{len(casts)}"
+                    casts.append(f"TRY_CAST({source_sql or 'NULL'} AS {cast}) AS {alias}")
+                    return computed[field].sql(alias)
+                return computed[field].sql(source_sql or "NULL::VARCHAR")
+            # Empty cells read as NULL; coalesce so they group like the Python backend
+            return f"COALESCE({quote_identifier(field)}, '')"
+
+        row_exprs = [(f, field_sql(f)) for f in row_fields]
+        column_exprs = [field_sql(f) for f in column_fields] if column_fields else None
+        source = f"(SELECT *, {', '.join(casts)} FROM data)" if casts else "data"
+        if not pivot_to_csv(con, output_file, row_exprs, column_exprs, sort=True, source=source):
+            _write_header(output_file, _empty_header(row_fields, column_fields))
+    return True
+
+
+def _run_pivot_python(input_file, output_file, row_fields, column_fields, computed):
+    """Standard-library backend of run_pivot."""
+    # One flat dict keyed by (row_key, col_key), or by row_key without columns
+    counts = defaultdict(int)
+
+    with open(input_file, "r", encoding="utf-8", newline="",
+              buffering=_IO_BUFFER_SIZE) as infile:
+        reader = csv.reader(infile)
+        index = {field: i for i, field in enumerate(next(reader, []))}
+        if not _check_fields(index, row_fields + (column_fields or []), computed):
+            _write_header(output_file, _empty_header(row_fields, column_fields))
+            return False
+
+        read_row_key = _key_reader(row_fields, index, computed)
+        read_col_key = _key_reader(column_fields or [], index, computed)
+
+        for row_num, row in enumerate(reader, 1):
+            # csv.reader yields [] for blank lines, which DictReader used to skip
+            if not row:
+                continue
+            try:
+                col_key = read_col_key(row)
+                if col_key is None:
+                    continue
+                row_key = read_row_key(row)
+            except IndexError:
+                # %-style args defer formatting to logging, so library callers that
+                # raise the log level above WARNING skip it on ragged files
+                logging.warning("Missing field(s) at row %d. Skipping row.", row_num)
+                continue
+            if row_key is None:
+                continue
+
+            counts[(row_key, col_key) if column_fields else row_key] += 1
+
+    with open(output_file, "w", newline="", encoding="utf-8",
+              buffering=_IO_BUFFER_SIZE) as outfile:
+        writer = csv.writer(outfile, lineterminator="\n")
+        if not column_fields:
+            writer.writerow(list(row_fields) + ["count"])
+            writer.writerows(list(key) + [count] for key, count in sorted(counts.items()))
+            return True
+
+        unique_columns = sorted({col_key for _, col_key in counts})
+        writer.writerow(list(row_fields) + ["|".join(c) for c in unique_columns])
+
+        # Scatter the counted cells into one dense row per row key: one pass over
+        # the nonzero cells instead of a lookup per (row, column) output cell
+        col_index = {col_key: j for j, col_key in enumerate(unique_columns)}
+        width = len(unique_columns)
+        dense = {}
+        for (row_key, col_key), count in counts.items():
+            cells = dense.get(row_key)
+            if cells is None:
+                cells = dense[row_key] = [0] * width
+            cells[col_index[col_key]] = count
+        writer.writerows(list(row_key) + dense[row_key] for row_key in sorted(dense))
+    return True
+
+
+def _field_getter(field, index, computed):
+    """Return the (column index, converter) pair reading a field from a CSV row."""
+    if field in computed:
+        return index.get(computed[field].source), computed[field].func
+    return index[field], None
+
+
+def _key_reader(fields, index, computed):
+    """Build a function reading a key tuple from a CSV row, or None to skip the row."""
+    getters = [_field_getter(f, index, computed) for f in fields]
+    if not getters:
+        return lambda row: ()
+    if any(i is None for i, _ in getters):
+        return partial(_read_key, getters=getters)
+
+    if len(getters) == 1 and getters[0][1] is not None:
+        # A lone computed field (e.g. --columns uptime) needs no list or splice
+        i, func = getters[0]
+
+        def read_computed_key(row):
+            value = func(row[i] if i < len(row) else None)
+            return None if value is None else (value,)
+
+        return read_computed_key
+
+    # One C-level itemgetter call fetches every cell; converters then run in place
+    get_values = itemgetter(*(i for i, _ in getters))
+    if len(getters) == 1:
+        get_value = get_values
+
+        def get_values(row):
+            return (get_value(row),)
+
+    converters = [(pos, func) for pos, (_, func) in enumerate(getters) if func is not None]
+    if not converters:
+        return get_values
+
+    def read_key(row):
+        try:
+            key = list(get_values(row))
+        except IndexError:
+            return _read_key(row, getters)
+        for pos, func in converters:
+            value = func(key[pos])
+            if value is None:
+                return None
+            key[pos] = value
+        return tuple(key)
+
+    return read_key
+
+
+def _read_key(row, getters):
+    """Read a key tuple from a CSV row, or None if a computed field skips the row."""
+    key = []
+    for i, func in getters:
+        if func is None:
+            key.append(row[i])
+            continue
+        # A short row lacks the source like a CSV without the field
+        value = func(row[i] if i is not None and i < len(row) else None)
+        if value is None:
+            return None
+        key.append(value)
+    return tuple(key)
+
+
+def _read_header(input_file):
+    """Return the header row of a CSV file as csv.reader parses it."""
+    with open(input_file, "r", encoding="utf-8", newline="") as infile:
+        return next(csv.reader(infile), [])
+
+
+def _empty_header(row_fields, column_fields):
+    """Return the header of a run_pivot output without any counted rows."""
+    return list(row_fields) + ([] if column_fields else ["count"])
+
+
+def _write_header(output_file, header):
+    """Write a CSV file holding only a header row."""
+    with open(output_file, "w", newline="", encoding="utf-8") as outfile:
+        csv.writer(outfile, lineterminator="\n").writerow(header)
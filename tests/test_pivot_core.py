@@ -0,0 +1,156 @@
+"""
+Backend parity tests for pivot_core.run_pivot.
+
+Each case pivots the same input with the DuckDB and the Python backend and
+checks that both write the same rows.
+
+Run with: python -m unittest discover
+"""
+
+import csv
+import logging
+import os
+import tempfile
+import unittest
+
+from pivot_core import duckdb, run_pivot
+from uptime_pivot import uptime_field
+
+# Fixed clock so the uptime buckets do not depend on when the tests run
+NOW_EPOCH = 1760529600.0  # 2025-10-15 12:00:00 UTC
+DAY = 86400
+
+PODS = (
+    "ns,pod,region,starttime\n"
+    f"a,p1,us,{NOW_EPOCH - 10 * DAY}\n"
+    f"a,p2,eu,{NOW_EPOCH - 200 * DAY}\n"
+    f"b,p3,us,{int(NOW_EPOCH - 800 * DAY)}\n"
+    f"b,p4,us,{NOW_EPOCH - 400 * DAY}\n"
+    f"c,p5,eu,{NOW_EPOCH - 100 * DAY}\n"
+)
+
+BAD_STARTTIMES = (
+    "ns,region,starttime\n"
+    "a,us,\n"
+    "a,us,abc\n"
+    "a,eu,nan\n"
+    "b,eu,inf\n"
+    "b,us,-inf\n"
+    "b,us,1e300\n"
+    "c,us,-1e20\n"
+    "c,eu,-62135596801\n"
+    "c,eu,-62135596800\n"
+    f"d,us,{NOW_EPOCH + DAY}\n"
+    f"d,us,{NOW_EPOCH - 30 * DAY}\n"
+)
+
+
+@unittest.skipIf(duckdb is None, "duckdb is not installed")
+class BackendParityTest(unittest.TestCase):
+    """Compare the DuckDB and Python backends of run_pivot."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        # Fallback and skipped-row warnings are expected for most inputs here
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def run_both(self, text, row_fields, column_fields=None, computed=None):
+        """Pivot text with both backends and return the parsed output of each."""
+        input_file = os.path.join(self.tmp, "input.csv")
+        with open(input_file, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+        results = []
+        for backend in ("duckdb", "python"):
+            output_file = os.path.join(self.tmp, f"{backend}.csv")
+            run_pivot(input_file, output_file, row_fields, column_fields,
+                      computed=computed, backend=backend, threads=2)
+            with open(output_file, "r", encoding="utf-8", newline="") as f:
+                results.append(list(csv.reader(f)))
+        return results
+
+    def assert_same(self, text, row_fields, column_fields=None, computed=None):
+        """Assert both backends write the same non-empty rows for text."""
+        duckdb_rows, python_rows = self.run_both(text, row_fields, column_fields, computed)
+        self.assertTrue(python_rows)
+        self.assertEqual(duckdb_rows, python_rows)
+        return python_rows
+
+    def uptime(self, include_invalid=True, uptime_as_days=False):
+        """Return the computed uptime field for NOW_EPOCH."""
+        return {"uptime": uptime_field(NOW_EPOCH, include_invalid, uptime_as_days)}
+
+    def test_plain_fields(self):
+        self.assert_same(PODS, ["ns"], ["region"])
+        self.assert_same(PODS, ["ns", "region"])
+
+    def test_uptime_buckets(self):
+        for include_invalid in (True, False):
+            with self.subTest(include_invalid=include_invalid):
+                computed = self.uptime(include_invalid)
+                self.assert_same(PODS, ["ns"], ["uptime"], computed)
+                self.assert_same(PODS, ["ns", "uptime"], computed=computed)
+
+    def test_uptime_as_days(self):
+        for include_invalid in (True, False):
+            with self.subTest(include_invalid=include_invalid):
+                computed = self.uptime(include_invalid, uptime_as_days=True)
+                self.assert_same(PODS, ["ns"], ["uptime"], computed)
+                self.assert_same(BAD_STARTTIMES, ["ns", "uptime"], computed=computed)
+
+    def test_invalid_start_times(self):
+        for include_invalid in (True, False):
+            for uptime_as_days in (False, True):
+                with self.subTest(include_invalid=include_invalid, uptime_as_days=uptime_as_days):
+                    computed = self.uptime(include_invalid, uptime_as_days)
+                    self.assert_same(BAD_STARTTIMES, ["ns"], ["uptime"], computed)
+
+    def test_multi_field_column_keys(self):
+        rows = self.assert_same(PODS, ["ns"], ["uptime", "region"], self.uptime())
+        self.assertIn("0-3 months|us", rows[0])
+
+    def test_empty_cells(self):
+        text = "ns,region,starttime\n,us,\na,,\n,,\n\"\",eu,1\n"
+        self.assert_same(text, ["ns"], ["region"])
+        self.assert_same(text, ["ns", "region"])
+        self.assert_same(text, ["region"], ["uptime"], self.uptime())
+
+    def test_ragged_and_blank_lines(self):
+        cases = {
+            "short row": "ns,region\na,us\nb\nc,eu\n",
+            "long row": "ns,region\na,us\nb,eu,extra\n",
+            "long first row": "ns,region\na,us,extra\nb,eu\n",
+            "blank lines": "ns,region\na,us\n\nb,eu\n\n",
+        }
+        for name, text in cases.items():
+            with self.subTest(name):
+                self.assert_same(text, ["ns"], ["region"])
+                self.assert_same(text, ["ns", "region"])
+
+    def test_header_names(self):
+        cases = {
+            "duplicate": "ns,ns,region\na,b,us\nc,d,eu\n",
+            "case clash": "ns,NS,region\na,b,us\nc,d,eu\n",
+            "bom": "\ufeffns,region\na,us\nb,eu\n",
+        }
+        for name, text in cases.items():
+            with self.subTest(name):
+                self.assert_same(text, ["ns"], ["region"])
+                self.assert_same(text, ["region"])
+
+    def test_pivot_value_equal_to_row_field(self):
+        text = "ns,region\na,ns\nb,region\nb,ns\n"
+        rows = self.assert_same(text, ["ns"], ["region"])
+        self.assertEqual(rows[0], ["ns", "ns", "region"])
+
+    def test_missing_field(self):
+        self.assert_same(PODS, ["ns"], ["zone"])
+        uptime = self.uptime()["uptime"]._replace(source="zone")
+        self.assert_same(PODS, ["ns"], ["uptime"], {"uptime": uptime})
+
+
+if __name__ == "__main__":
+    unittest.main()
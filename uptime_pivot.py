@@ -26,158 +26,130 @@ Example usage:
 import argparse
 import csv
 import logging
-from collections import defaultdict
-from datetime import datetime
+import time
+from bisect import bisect_right
+from functools import lru_cache
+
+from pivot_core import ComputedField, duckdb, run_pivot
 
 __version__ = "1.1.0"
 
+# Lower bound in days of each age bucket after the first
+_AGE_THRESHOLDS = (90, 180, 365, 731)
+_AGE_LABELS = ("0-3 months", "3-6 months", "6-12 months", "1-2 years", ">2 years")
+
+# Earliest start time a datetime can hold (0001-01-01 UTC); anything older is invalid
+_MIN_START_EPOCH = -62135596800.0
 
-def classify_pod_age(start_epoch, current_time):
+
+def classify_pod_age(start_epoch, now_epoch):
     """Classify pod age in bucketed ranges based on the start time."""
     try:
-        start_time = datetime.utcfromtimestamp(float(start_epoch))
+        start = float(start_epoch)
+        age = now_epoch - start
+        days = int(age // 86400)
     except (ValueError, OverflowError):
         return "invalid"
 
-    delta = current_time - start_time
-    if delta.total_seconds() < 0:
+    if age < 0 or start < _MIN_START_EPOCH:
         return "invalid"
 
-    days = delta.days
-    if days > 730:
-        return ">2 years"
-    if 365 <= days <= 730:
-        return "1-2 years"
-    if 180 <= days < 365:
-        return "6-12 months"
-    if 90 <= days < 180:
-        return "3-6 months"
-    if 0 <= days < 90:
-        return "0-3 months"
-
-    return "invalid"
+    return _AGE_LABELS[bisect_right(_AGE_THRESHOLDS, days)]
 
 
-def days_since_epoch(start_epoch, now):
+def days_since_epoch(start_epoch, now_epoch):
     """Calculate the number of days since the start_epoch."""
     try:
-        start_time = datetime.utcfromtimestamp(float(start_epoch))
+        start = float(start_epoch)
+        age = now_epoch - start
+        days = int(age // 86400)
     except (ValueError, OverflowError):
         return "invalid"
 
-    delta = now - start_time
-    if delta.total_seconds() < 0:
+    if age < 0 or start < _MIN_START_EPOCH:
         return "invalid"
 
-    return str(delta.days)
+    return str(days)
+
+
+def uptime_sql(start_expr, now_epoch, uptime_as_days, include_invalid):
+    """Build a SQL expression classifying start_expr (epoch seconds as DOUBLE) like classify_pod_age."""
+    days = f"floor(({now_epoch!r} - {start_expr}) / 86400)"
+    invalid = "'invalid'" if include_invalid else "NULL"
+    if uptime_as_days:
+        # DuckDB may evaluate the cast for rows the outer CASE rejects; TRY_CAST
+        # keeps one out-of-range cell from aborting the query
+        valid = f"COALESCE(CAST(TRY_CAST({days} AS BIGINT) AS VARCHAR), {invalid})"
+    else:
+        branches = [
+            f"WHEN {days} >= {threshold} THEN '{label}'"
+            for threshold, label in reversed(list(zip(_AGE_THRESHOLDS, _AGE_LABELS[1:])))
+        ]
+        valid = f"CASE {' '.join(branches)} ELSE '{_AGE_LABELS[0]}' END"
+    return (
+        f"CASE WHEN {start_expr} IS NULL OR NOT isfinite({start_expr}) "
+        f"OR {start_expr} > {now_epoch!r} OR {start_expr} < {_MIN_START_EPOCH!r} "
+        f"THEN {invalid} ELSE {valid} END"
+    )
+
+
+def uptime_field(now_epoch, include_invalid, uptime_as_days):
+    """Build the computed uptime field derived from starttime for pivot_core."""
+    classify = days_since_epoch if uptime_as_days else classify_pod_age
+
+    # now_epoch is fixed for the run, so cache on the raw starttime string alone;
+    # replicas and second-truncated timestamps repeat it often
+    @lru_cache(maxsize=1 << 16)
+    def uptime(start_epoch):
+        value = classify(start_epoch, now_epoch) if start_epoch else "invalid"
+        if value == "invalid" and not include_invalid:
+            return None
+        return value
+
+    return ComputedField(
+        source="starttime",
+        sql=lambda start_expr: uptime_sql(start_expr, now_epoch, uptime_as_days, include_invalid),
+        func=uptime,
+        cast="DOUBLE",
+    )
+
+
+def pivot_backend(engine):
+    """Resolve an --engine choice to a pivot_core backend, preferring DuckDB for auto."""
+    if engine == "auto":
+        return "duckdb" if duckdb is not None else "python"
+    return engine
 
 
 def pivot_data(input_file, output_file, row_fields, column_fields,
-               include_invalid, now, uptime_as_days):
+               include_invalid, now_epoch, uptime_as_days, engine="auto", jobs=None):
     """Pivot the CSV data into a grouped count table."""
-    data = defaultdict(lambda: defaultdict(int))
-    unique_columns = set()
-
-    with open(input_file, "r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-
-        for row_num, row in enumerate(reader, 1):
-            col_vals = []
-            skip_row = False
-
-            for col_field in column_fields:
-                if col_field == "uptime":
-                    start_epoch = row.get("starttime")
-                    if not start_epoch:
-                        col_val = "invalid" if include_invalid else None
-                    else:
-                        col_val = (
-                            days_since_epoch(start_epoch, now)
-                            if uptime_as_days else
-                            classify_pod_age(start_epoch, now)
-                        )
-                        if col_val == "invalid" and not include_invalid:
-                            col_val = None
-                else:
-                    col_val = row.get(col_field)
-
-                if col_val is None:
-                    skip_row = True
-                    break
-
-                col_vals.append(col_val)
-
-            if skip_row:
-                continue
-
-            col_key = tuple(col_vals) if len(col_vals) > 1 else col_vals[0]
-
-            try:
-                row_key = tuple(row[field] for field in row_fields)
-            except KeyError as e:
-                logging.warning(f"Missing field {e} at row {row_num}. Skipping row.")
-                continue
-
-            data[row_key][col_key] += 1
-            unique_columns.add(col_key)
-
-    unique_columns = sorted(unique_columns)
-
-    def format_col_key(key):
-        return "|".join(key) if isinstance(key, tuple) else key
-
-    with open(output_file, "w", newline="", encoding="utf-8") as outfile:
-        writer = csv.writer(outfile)
-        writer.writerow(list(row_fields) + [format_col_key(c) for c in unique_columns])
-        for row_key, counts in sorted(data.items()):
-            row = list(row_key)
-            for col in unique_columns:
-                row.append(counts.get(col, 0))
-            writer.writerow(row)
+    uptime = uptime_field(now_epoch, include_invalid, uptime_as_days)
+    run_pivot(
+        input_file, output_file, row_fields, column_fields,
+        computed={"uptime": uptime},
+        backend=pivot_backend(engine),
+        threads=jobs,
+    )
+    logging.debug(f"Uptime cache: {uptime.func.cache_info()}")
 
 
 def flatten_data(input_file, output_file, row_fields,
-                 include_invalid, now, uptime_as_days):
+                 include_invalid, now_epoch, uptime_as_days, engine="auto", jobs=None):
     """Output a flattened CSV with uptime as a row field."""
-    summary = defaultdict(int)
-
     with open(input_file, "r", encoding="utf-8", newline="") as infile:
-        reader = csv.DictReader(infile)
-
-        if "starttime" not in reader.fieldnames:
+        if "starttime" not in next(csv.reader(infile), []):
             logging.error("Error: 'starttime' column missing from input CSV.")
             return
 
-        for row_num, row in enumerate(reader, 1):
-            try:
-                row_key = [row[field] for field in row_fields] if row_fields else []
-            except KeyError as e:
-                logging.warning(f"Missing field {e} at row {row_num}. Skipping row.")
-                continue
-
-            start_epoch = row.get("starttime")
-            if not start_epoch:
-                uptime = "invalid" if include_invalid else None
-            else:
-                uptime = (
-                    days_since_epoch(start_epoch, now)
-                    if uptime_as_days else
-                    classify_pod_age(start_epoch, now)
-                )
-                if uptime == "invalid" and not include_invalid:
-                    uptime = None
-
-            if uptime is None:
-                continue
-
-            full_key = tuple(row_key + [uptime])
-            summary[full_key] += 1
-
-    with open(output_file, "w", newline="", encoding="utf-8") as outfile:
-        writer = csv.writer(outfile)
-        writer.writerow((row_fields if row_fields else []) + ["uptime", "count"])
-        for key, count in sorted(summary.items()):
-            writer.writerow(list(key) + [count])
+    uptime = uptime_field(now_epoch, include_invalid, uptime_as_days)
+    run_pivot(
+        input_file, output_file, (row_fields or []) + ["uptime"],
+        computed={"uptime": uptime},
+        backend=pivot_backend(engine),
+        threads=jobs,
+    )
+    logging.debug(f"Uptime cache: {uptime.func.cache_info()}")
 
 
 def main():
@@ -217,6 +189,14 @@ def main():
         "--uptime-as-days", action="store_true",
         help="Use exact number of days instead of bucketed uptime"
     )
+    parser.add_argument(
+        "--engine", choices=("auto", "duckdb", "python"), default="auto",
+        help="Pivot engine; auto uses DuckDB when installed (default: auto)"
+    )
+    parser.add_argument(
+        "--jobs", type=int,
+        help="Number of DuckDB worker threads (default: all cores)"
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true",
         help="Enable verbose output including warnings"
@@ -244,7 +224,14 @@ def main():
     if not args.rows and not args.uptime_as_row:
         parser.error("Missing required argument: --rows (unless using --uptime-as-row)")
 
-    now = datetime.utcnow()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if args.engine == "duckdb" and duckdb is None:
+        parser.error("--engine duckdb requires the duckdb package (pip install duckdb)")
+
+    # starttime values are epoch seconds, so compare against the epoch clock
+    now_epoch = time.time()
 
     if args.uptime_as_row:
         flatten_data(
@@ -252,8 +239,10 @@ def main():
             output_file=args.output,
             row_fields=args.rows,
             include_invalid=args.include_invalid,
-            now=now,
+            now_epoch=now_epoch,
             uptime_as_days=args.uptime_as_days,
+            engine=args.engine,
+            jobs=args.jobs,
         )
     else:
         if not args.columns:
@@ -264,8 +253,10 @@ def main():
             row_fields=args.rows,
             column_fields=args.columns,
             include_invalid=args.include_invalid,
-            now=now,
+            now_epoch=now_epoch,
             uptime_as_days=args.uptime_as_days,
+            engine=args.engine,
+            jobs=args.jobs,
         )
 
     logging.info(f"Output saved to '{args.output}'")